@@ -24,17 +24,17 @@ app.layout = html.Div([
     html.Div(id='page-content', className='content')
 ])
 
-# Route handling
+# Route handling: pages are rebuilt on every visit so they always show the current data
 @app.callback(Output('page-content', 'children'), [Input('url', 'pathname')])
 def display_page(pathname):
     if pathname == '/dashboard2':
-        return dashboard2.layout
+        return dashboard2.build_layout()
     elif pathname == '/dashboard3':
-        return dashboard3.layout
+        return dashboard3.build_layout()
     elif pathname == '/dashboard4':
-        return dashboard4.layout
+        return dashboard4.build_layout()
     else:
-        return dashboard1.layout
+        return dashboard1.build_layout()
 
 # External CSS via Dash for styling
 app.index_string = '''
@@ -1,14 +1,10 @@
 # Importing necessary modules for building the dashboard, data manipulation, and plotting
 from dash import html, dcc  # Dash components for creating web apps
-import pandas as pd  # For data manipulation
 import plotly.express as px  # For creating Plotly visualizations
 import matplotlib.pyplot as plt  # For creating matplotlib visualizations
 import seaborn as sns  # For enhanced data visualization with matplotlib
-import io  # For in-memory binary streams
-import base64  # For encoding images in base64 format
-
-# Loading the dataset into a Pandas DataFrame
-df = pd.read_csv(r"medical.csv")
+from datasource import Query, get_data_source  # Shared CSV or database data source
+from rendering import render_context, save_plot_to_base64  # Figure lifecycle helpers
 
 # Defining a pastel purple color palette for visualizations
 pastel_purple_palette = [
@@ -30,100 +26,111 @@ state_abbreviation_mapping = {
     'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT', 'Virginia': 'VA',
     'Washington': 'WA', 'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY'
 }
-df['StateAbbr'] = df['State'].map(state_abbreviation_mapping)
 
-# Helper function to convert matplotlib plots into base64-encoded images
-def save_plot_to_base64(fig):
-    buf = io.BytesIO()  # Create an in-memory byte stream
-    fig.savefig(buf, format="png")  # Save the figure as a PNG into the stream
-    buf.seek(0)  # Move the stream position to the beginning
-    return base64.b64encode(buf.read()).decode("utf-8")  # Encode as base64 and decode to string
+# Helper function to turn grouped row counts into value counts, largest first
+def counts_by(grouped, column):
+    return grouped.dropna(subset=[column]).groupby(column)['Count'].sum().sort_values(ascending=False)
+
+# Building the page on demand; the data, figures and intermediates are released once it is returned
+def build_layout():
+    # Fetching the grouped row counts behind every graph in one concurrent batch
+    data = get_data_source().aggregate_many({
+        'state': Query(by=['State']),
+        'race': Query(by=['RaceEthnicityCategory']),
+        'age': Query(by=['AgeCategory']),
+        'sex': Query(by=['Sex']),
+    })
 
-# Graph 1: Creating a choropleth map of population count by state
-state_counts = df['StateAbbr'].value_counts().reset_index()  # Count the number of people per state
-state_counts.columns = ['StateAbbr', 'PopulationCount']  # Rename columns for clarity
-fig1 = px.choropleth(  # Create a choropleth map with Plotly
-    state_counts,
-    locations='StateAbbr',
-    locationmode="USA-states",
-    color='PopulationCount',
-    hover_name='StateAbbr',
-    color_continuous_scale=pastel_purple_palette,
-    scope="usa",
-    labels={'PopulationCount': 'Number of People'}
-)
-fig1.update_layout(title_text='Number of People by State')  # Add title to the plot
+    # Graph 1: Creating a choropleth map of population count by state
+    data['state']['StateAbbr'] = data['state']['State'].map(state_abbreviation_mapping)  # Map state names to abbreviations
+    state_counts = counts_by(data['state'], 'StateAbbr').reset_index()  # Count the number of people per state
+    state_counts.columns = ['StateAbbr', 'PopulationCount']  # Rename columns for clarity
+    fig1 = px.choropleth(  # Create a choropleth map with Plotly
+        state_counts,
+        locations='StateAbbr',
+        locationmode="USA-states",
+        color='PopulationCount',
+        hover_name='StateAbbr',
+        color_continuous_scale=pastel_purple_palette,
+        scope="usa",
+        labels={'PopulationCount': 'Number of People'}
+    )
+    fig1.update_layout(title_text='Number of People by State')  # Add title to the plot
 
-# Graph 2: Creating a pie chart for race distribution
-race_counts = df['RaceEthnicityCategory'].value_counts()  # Count occurrences of each race/ethnicity
-plt.figure(figsize=(8, 8))  # Set figure size
-plt.pie(
-    race_counts,
-    labels=race_counts.index,
-    autopct='%1.1f%%',
-    startangle=90,
-    colors=pastel_purple_palette[:len(race_counts)]  # Use palette colors
-)
-plt.title('Race Distribution')  # Add title to the pie chart
-plt.axis('equal')  # Ensure the pie chart is circular
-race_chart_base64 = save_plot_to_base64(plt)  # Save the plot as a base64-encoded string
+    # Graph 2: Creating a pie chart for race distribution
+    race_counts = counts_by(data['race'], 'RaceEthnicityCategory')  # Count occurrences of each race/ethnicity
+    with render_context():  # Hold pyplot only while this figure is drawn and encoded
+        fig = plt.figure(figsize=(8, 8))  # Create a figure of the given size
+        plt.pie(
+            race_counts,
+            labels=race_counts.index,
+            autopct='%1.1f%%',
+            startangle=90,
+            colors=pastel_purple_palette[:len(race_counts)]  # Use palette colors
+        )
+        plt.title('Race Distribution')  # Add title to the pie chart
+        plt.axis('equal')  # Ensure the pie chart is circular
+        race_chart_base64 = save_plot_to_base64(fig)  # Save the figure as a base64-encoded string and close it
 
-# Graph 3: Creating a bar chart for age distribution
-age_counts = df['AgeCategory'].value_counts().reset_index()  # Count occurrences of each age category
-age_counts.columns = ['AgeCategory', 'Count']  # Rename columns for clarity
-plt.figure(figsize=(8, 6))  # Set figure size
-sns.set(style="whitegrid")  # Set seaborn style
-sns.barplot(x='AgeCategory', y='Count', data=age_counts, palette=pastel_purple_palette[:len(age_counts)])  # Create bar chart
-plt.xlabel('Age Category')  # Add x-axis label
-plt.ylabel('Count')  # Add y-axis label
-plt.title('Age Distribution by Category')  # Add title
-plt.xticks(rotation=45)  # Rotate x-axis labels for readability
-age_chart_base64 = save_plot_to_base64(plt)  # Save the plot as a base64-encoded string
+    # Graph 3: Creating a bar chart for age distribution
+    age_counts = counts_by(data['age'], 'AgeCategory').reset_index()  # Count occurrences of each age category
+    age_counts.columns = ['AgeCategory', 'Count']  # Rename columns for clarity
+    with render_context():  # Hold pyplot only while this figure is drawn and encoded
+        fig = plt.figure(figsize=(8, 6))  # Create a figure of the given size
+        sns.set(style="whitegrid")  # Set seaborn style
+        sns.barplot(x='AgeCategory', y='Count', data=age_counts, palette=pastel_purple_palette[:len(age_counts)])  # Create bar chart
+        plt.xlabel('Age Category')  # Add x-axis label
+        plt.ylabel('Count')  # Add y-axis label
+        plt.title('Age Distribution by Category')  # Add title
+        plt.xticks(rotation=45)  # Rotate x-axis labels for readability
+        age_chart_base64 = save_plot_to_base64(fig)  # Save the figure as a base64-encoded string and close it
 
-# Graph 4: Creating a donut chart for gender distribution
-gender_counts = df['Sex'].value_counts()  # Count occurrences of each gender
-plt.figure(figsize=(8, 8))  # Set figure size
-plt.pie(
-    gender_counts,
-    labels=gender_counts.index,
-    autopct='%1.1f%%',
-    startangle=90,
-    colors=[pastel_purple_palette[2], pastel_purple_palette[5]],  # Use specific colors from the palette
-    wedgeprops={'width': 0.4}  # Create a donut chart by reducing the width of wedges
-)
-plt.title('Gender Distribution')  # Add title to the chart
-plt.axis('equal')  # Ensure the chart is circular
-gender_chart_base64 = save_plot_to_base64(plt)  # Save the plot as a base64-encoded string
+    # Graph 4: Creating a donut chart for gender distribution
+    gender_counts = counts_by(data['sex'], 'Sex')  # Count occurrences of each gender
+    with render_context():  # Hold pyplot only while this figure is drawn and encoded
+        sns.set(style="whitegrid")  # Same seaborn style as the age chart
+        fig = plt.figure(figsize=(8, 8))  # Create a figure of the given size
+        plt.pie(
+            gender_counts,
+            labels=gender_counts.index,
+            autopct='%1.1f%%',
+            startangle=90,
+            colors=[pastel_purple_palette[2], pastel_purple_palette[5]],  # Use specific colors from the palette
+            wedgeprops={'width': 0.4}  # Create a donut chart by reducing the width of wedges
+        )
+        plt.title('Gender Distribution')  # Add title to the chart
+        plt.axis('equal')  # Ensure the chart is circular
+        gender_chart_base64 = save_plot_to_base64(fig)  # Save the figure as a base64-encoded string and close it
 
-# Creating the Dash app layout
-layout = html.Div([
-    html.H1("Demographics Dashboard", style={'textAlign': 'center'}),  # Add main heading
+    # Creating the Dash app layout
+    return html.Div([
+        html.H1("Demographics Dashboard", style={'textAlign': 'center'}),  # Add main heading
 
-    html.Div([
-        # Top row: Choropleth map and race distribution pie chart
         html.Div([
+            # Top row: Choropleth map and race distribution pie chart
             html.Div([
-                html.H2("Number of People by State"),  # Add heading for the map
-                dcc.Graph(figure=fig1)  # Display the Plotly choropleth map
-            ], style={'flex': '1', 'margin': '10px'}),  # Define flexbox layout for the map
+                html.Div([
+                    html.H2("Number of People by State"),  # Add heading for the map
+                    dcc.Graph(figure=fig1)  # Display the Plotly choropleth map
+                ], style={'flex': '1', 'margin': '10px'}),  # Define flexbox layout for the map
             
-            html.Div([
-                html.H2("Race Distribution"),  # Add heading for the pie chart
-                html.Img(src=f"data:image/png;base64,{race_chart_base64}", style={'width': '100%'})  # Display pie chart image
-            ], style={'flex': '1', 'margin': '10px'})  # Define flexbox layout for the pie chart
-        ], style={'display': 'flex', 'justify-content': 'space-between'}),  # Set up a row with flexbox
+                html.Div([
+                    html.H2("Race Distribution"),  # Add heading for the pie chart
+                    html.Img(src=f"data:image/png;base64,{race_chart_base64}", style={'width': '100%'})  # Display pie chart image
+                ], style={'flex': '1', 'margin': '10px'})  # Define flexbox layout for the pie chart
+            ], style={'display': 'flex', 'justify-content': 'space-between'}),  # Set up a row with flexbox
 
-        # Bottom row: Age distribution bar chart and gender distribution donut chart
-        html.Div([
+            # Bottom row: Age distribution bar chart and gender distribution donut chart
             html.Div([
-                html.H2("Age Distribution by Category"),  # Add heading for the bar chart
-                html.Img(src=f"data:image/png;base64,{age_chart_base64}", style={'width': '100%'})  # Display bar chart image
-            ], style={'flex': '1', 'margin': '10px'}),  # Define flexbox layout for the bar chart
+                html.Div([
+                    html.H2("Age Distribution by Category"),  # Add heading for the bar chart
+                    html.Img(src=f"data:image/png;base64,{age_chart_base64}", style={'width': '100%'})  # Display bar chart image
+                ], style={'flex': '1', 'margin': '10px'}),  # Define flexbox layout for the bar chart
             
-            html.Div([
-                html.H2("Gender Distribution"),  # Add heading for the donut chart
-                html.Img(src=f"data:image/png;base64,{gender_chart_base64}", style={'width': '100%'})  # Display donut chart image
-            ], style={'flex': '1', 'margin': '10px'})  # Define flexbox layout for the donut chart
-        ], style={'display': 'flex', 'justify-content': 'space-between'})  # Set up another row with flexbox
-    ], style={'padding': '20px'}),  # Add padding around the grid layout
-])
+                html.Div([
+                    html.H2("Gender Distribution"),  # Add heading for the donut chart
+                    html.Img(src=f"data:image/png;base64,{gender_chart_base64}", style={'width': '100%'})  # Display donut chart image
+                ], style={'flex': '1', 'margin': '10px'})  # Define flexbox layout for the donut chart
+            ], style={'display': 'flex', 'justify-content': 'space-between'})  # Set up another row with flexbox
+        ], style={'padding': '20px'}),  # Add padding around the grid layout
+    ])
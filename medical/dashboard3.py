@@ -3,9 +3,7 @@ from dash import html, dcc  # Dash components for creating web apps
 import pandas as pd  # For data manipulation
 import plotly.express as px  # For creating Plotly visualizations
 import plotly.graph_objects as go  # For creating advanced Plotly visualizations
-
-# Loading the dataset into a Pandas DataFrame
-df = pd.read_csv(r"medical.csv")
+from datasource import Query, get_data_source  # Shared CSV or database data source
 
 # Defining a pastel purple color palette for visualizations
 pastel_purple_palette = [
@@ -27,146 +25,157 @@ state_abbreviation_mapping = {
     'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT', 'Virginia': 'VA',
     'Washington': 'WA', 'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY'
 }
-df['StateAbbr'] = df['State'].map(state_abbreviation_mapping)
 
 # Defining a function to group health days into bins
 def map_health_to_bins(value):
     return (value // 3) + 1  # Converts continuous days into grouped ratings
 
-# Applying the binning function to mental and physical health days
-df['MappedMentalHealth'] = df['MentalHealthDays'].apply(map_health_to_bins)
-df['MappedPhysicalHealth'] = df['PhysicalHealthDays'].apply(map_health_to_bins)
+# Filter selecting respondents who tested positive for COVID-19
+covid_positive = ('CovidPos', '==', 'Yes')
+
+# Building the page on demand; the data, figures and intermediates are released once it is returned
+def build_layout():
+    # Fetching the grouped row counts behind every graph in one concurrent batch
+    data = get_data_source().aggregate_many({
+        'covid_state': Query(by=['State'], where=[covid_positive]),
+        'covid_month': Query(by=['Year', 'Month'], where=[covid_positive, ('Year', '==', 2020)]),
+        'mental_month': Query(by=['Year', 'Month', 'MentalHealthDays'], where=[('Year', '==', 2020)]),
+        'depressive_year': Query(by=['Year'], where=[('HadDepressiveDisorder', '==', 'Yes'), ('Year', 'in', [2019, 2020, 2021])]),
+        'covid_age': Query(by=['AgeCategory'], where=[covid_positive]),
+    })
 
-# Graph 1: Creating a choropleth map for COVID cases by state
-covid_hits_state = df[df['CovidPos'] == 'Yes'].groupby('StateAbbr').size().reset_index(name='COVIDCount')  # Count COVID cases per state
-total_covid_cases = covid_hits_state['COVIDCount'].sum()  # Calculate total COVID cases
-covid_hits_state['Percentage'] = (covid_hits_state['COVIDCount'] / total_covid_cases) * 100  # Calculate percentage of cases per state
-fig1 = px.choropleth(  # Create a choropleth map
-    covid_hits_state,
-    locations='StateAbbr',
-    locationmode="USA-states",
-    color='Percentage',
-    hover_name='StateAbbr',
-    color_continuous_scale=pastel_purple_palette,
-    scope="usa",
-    labels={'Percentage': 'Percentage of COVID Cases'}
-)
-fig1.update_layout(  # Customize layout
-    title_text='Distribution of COVID Cases by State (Percentage)',
-    geo=dict(showframe=False, showcoastlines=False)
-)
+    # Graph 1: Creating a choropleth map for COVID cases by state
+    covid_state = data['covid_state']
+    covid_state['StateAbbr'] = covid_state['State'].map(state_abbreviation_mapping)  # Map state names to abbreviations
+    covid_hits_state = covid_state.groupby('StateAbbr')['Count'].sum().reset_index(name='COVIDCount')  # Count COVID cases per state
+    total_covid_cases = covid_hits_state['COVIDCount'].sum()  # Calculate total COVID cases
+    covid_hits_state['Percentage'] = (covid_hits_state['COVIDCount'] / total_covid_cases) * 100  # Calculate percentage of cases per state
+    fig1 = px.choropleth(  # Create a choropleth map
+        covid_hits_state,
+        locations='StateAbbr',
+        locationmode="USA-states",
+        color='Percentage',
+        hover_name='StateAbbr',
+        color_continuous_scale=pastel_purple_palette,
+        scope="usa",
+        labels={'Percentage': 'Percentage of COVID Cases'}
+    )
+    fig1.update_layout(  # Customize layout
+        title_text='Distribution of COVID Cases by State (Percentage)',
+        geo=dict(showframe=False, showcoastlines=False)
+    )
 
-# Graph 2: Creating a time series for COVID cases and mental health ratings
-df['YearMonth'] = pd.to_datetime(df[['Year', 'Month']].assign(Day=1))  # Combine Year and Month into a datetime column
-covid_time_series = (
-    df[(df['CovidPos'] == 'Yes') & (df['Year'] == 2020)]
-    .groupby(df['YearMonth'])['CovidPos']
-    .count()
-    .reset_index(name='CovidCount')
-)  # Count monthly COVID cases in 2020
-mapped_mental_health = (
-    df[(df['Year'] == 2020)]
-    .groupby(df['YearMonth'])['MappedMentalHealth']
-    .mean()
-    .reset_index(name='AvgMappedMentalHealth')
-)  # Calculate average mental health rating by month in 2020
-time_series = pd.merge(covid_time_series, mapped_mental_health, on='YearMonth', how='outer').fillna(0)  # Merge dataframes
-fig2 = go.Figure()  # Create a new figure
-fig2.add_trace(go.Scatter(  # Add line for COVID cases
-    x=time_series['YearMonth'],
-    y=time_series['CovidCount'],
-    mode='lines+markers',
-    name='COVID-19 Cases',
-    line=dict(color=pastel_purple_palette[5])
-))
-fig2.add_trace(go.Scatter(  # Add line for mental health ratings
-    x=time_series['YearMonth'],
-    y=time_series['AvgMappedMentalHealth'],
-    mode='lines+markers',
-    name='Mental Health Score',
-    line=dict(color='black'),
-    yaxis="y2"
-))
-fig2.update_layout(  # Customize layout
-    title='COVID-19 Cases and Mental Health Rating',
-    xaxis=dict(title='Month (2020)', tickformat='%b', tickangle=45),
-    yaxis=dict(title='COVID-19 Cases', titlefont=dict(color=pastel_purple_palette[5])),
-    yaxis2=dict(
-        title='Mental Health Rating',
-        titlefont=dict(color=pastel_purple_palette[3]),
-        overlaying='y',
-        side='right'
-    ),
-    legend=dict(x=0.1, y=1.1, orientation="h"),
-    template="plotly_white"
-)
+    # Graph 2: Creating a time series for COVID cases and mental health ratings
+    covid_month = data['covid_month']
+    covid_month['YearMonth'] = pd.to_datetime(covid_month[['Year', 'Month']].assign(Day=1))  # Combine Year and Month into a datetime column
+    covid_time_series = (
+        covid_month.groupby('YearMonth')['Count']
+        .sum()
+        .reset_index(name='CovidCount')
+    )  # Count monthly COVID cases in 2020
+    mental_month = data['mental_month'].dropna(subset=['MentalHealthDays']).assign(
+        YearMonth=lambda x: pd.to_datetime(x[['Year', 'Month']].assign(Day=1)),  # Combine Year and Month into a datetime column
+        MappedMentalHealth=lambda x: x['MentalHealthDays'].apply(map_health_to_bins)  # Apply binning for mental health
+    )
+    mapped_mental_health = (
+        (mental_month['MappedMentalHealth'] * mental_month['Count']).groupby(mental_month['YearMonth']).sum()
+        / mental_month.groupby('YearMonth')['Count'].sum()
+    ).reset_index(name='AvgMappedMentalHealth')  # Calculate average mental health rating by month in 2020
+    time_series = pd.merge(covid_time_series, mapped_mental_health, on='YearMonth', how='outer').fillna(0)  # Merge dataframes
+    fig2 = go.Figure()  # Create a new figure
+    fig2.add_trace(go.Scatter(  # Add line for COVID cases
+        x=time_series['YearMonth'],
+        y=time_series['CovidCount'],
+        mode='lines+markers',
+        name='COVID-19 Cases',
+        line=dict(color=pastel_purple_palette[5])
+    ))
+    fig2.add_trace(go.Scatter(  # Add line for mental health ratings
+        x=time_series['YearMonth'],
+        y=time_series['AvgMappedMentalHealth'],
+        mode='lines+markers',
+        name='Mental Health Score',
+        line=dict(color='black'),
+        yaxis="y2"
+    ))
+    fig2.update_layout(  # Customize layout
+        title='COVID-19 Cases and Mental Health Rating',
+        xaxis=dict(title='Month (2020)', tickformat='%b', tickangle=45),
+        yaxis=dict(title='COVID-19 Cases', titlefont=dict(color=pastel_purple_palette[5])),
+        yaxis2=dict(
+            title='Mental Health Rating',
+            titlefont=dict(color=pastel_purple_palette[3]),
+            overlaying='y',
+            side='right'
+        ),
+        legend=dict(x=0.1, y=1.1, orientation="h"),
+        template="plotly_white"
+    )
 
-# Graph 3: Creating a bar chart for depressive disorder cases
-df_depressive_disorder_yes = df[(df['HadDepressiveDisorder'] == 'Yes') & (df['Year'].isin([2019, 2020, 2021]))]  # Filter depressive disorder cases
-df_depressive_disorder_yes_grouped = (
-    df_depressive_disorder_yes.groupby('Year')['HadDepressiveDisorder']
-    .count()
-    .reset_index(name='Count')
-)  # Count cases by year
-df_depressive_disorder_yes_grouped['Percentage'] = (
-    df_depressive_disorder_yes_grouped['Count'] / df_depressive_disorder_yes_grouped['Count'].sum() * 100
-)  # Calculate percentage of cases by year
-fig3 = px.bar(  # Create a horizontal bar chart
-    df_depressive_disorder_yes_grouped,
-    x='Percentage',
-    y='Year',
-    orientation='h',
-    title='Percentage of Depressive Disorder Cases in 2019, 2020, and 2021',
-    labels={'Percentage': 'Percentage (%)', 'Year': 'Year'},
-    color='Percentage',
-    color_continuous_scale=pastel_purple_palette
-)
+    # Graph 3: Creating a bar chart for depressive disorder cases
+    df_depressive_disorder_yes_grouped = data['depressive_year']  # Depressive disorder cases counted by year
+    df_depressive_disorder_yes_grouped['Percentage'] = (
+        df_depressive_disorder_yes_grouped['Count'] / df_depressive_disorder_yes_grouped['Count'].sum() * 100
+    )  # Calculate percentage of cases by year
+    fig3 = px.bar(  # Create a horizontal bar chart
+        df_depressive_disorder_yes_grouped,
+        x='Percentage',
+        y='Year',
+        orientation='h',
+        title='Percentage of Depressive Disorder Cases in 2019, 2020, and 2021',
+        labels={'Percentage': 'Percentage (%)', 'Year': 'Year'},
+        color='Percentage',
+        color_continuous_scale=pastel_purple_palette
+    )
 
-# Graph 4: Creating a bar chart for COVID distribution by age
-covid_age_data = df[df['CovidPos'] == 'Yes'].groupby('AgeCategory').size().reset_index(name='COVIDCount')  # Count cases by age category
-fig4 = px.bar(  # Create a bar chart
-    covid_age_data,
-    x='AgeCategory',
-    y='COVIDCount',
-    title='COVID Distribution by Age',
-    labels={'AgeCategory': 'Age Category', 'COVIDCount': 'Number of COVID Cases'},
-    color='COVIDCount',
-    color_continuous_scale=pastel_purple_palette
-)
-fig4.update_layout(  # Customize layout
-    xaxis=dict(tickangle=45),
-    title_font_size=16,
-    xaxis_title_font_size=14,
-    yaxis_title_font_size=14
-)
+    # Graph 4: Creating a bar chart for COVID distribution by age
+    covid_age_data = (
+        data['covid_age'].dropna(subset=['AgeCategory'])
+        .rename(columns={'Count': 'COVIDCount'})
+    )  # Count cases by age category
+    fig4 = px.bar(  # Create a bar chart
+        covid_age_data,
+        x='AgeCategory',
+        y='COVIDCount',
+        title='COVID Distribution by Age',
+        labels={'AgeCategory': 'Age Category', 'COVIDCount': 'Number of COVID Cases'},
+        color='COVIDCount',
+        color_continuous_scale=pastel_purple_palette
+    )
+    fig4.update_layout(  # Customize layout
+        xaxis=dict(tickangle=45),
+        title_font_size=16,
+        xaxis_title_font_size=14,
+        yaxis_title_font_size=14
+    )
 
-# Creating the Dash app layout
-layout = html.Div([
-    html.H1("COVID-19 Dashboard", style={'textAlign': 'center'}),  # Add main heading
+    # Creating the Dash app layout
+    return html.Div([
+        html.H1("COVID-19 Dashboard", style={'textAlign': 'center'}),  # Add main heading
 
-    # Top row: Map and time series
-    html.Div([
+        # Top row: Map and time series
         html.Div([
-            html.H2("COVID Cases by State"),  # Add heading for the map
-            dcc.Graph(figure=fig1)  # Display the choropleth map
-        ], style={'flex': '1', 'margin': '10px'}),  # Define layout for the map
+            html.Div([
+                html.H2("COVID Cases by State"),  # Add heading for the map
+                dcc.Graph(figure=fig1)  # Display the choropleth map
+            ], style={'flex': '1', 'margin': '10px'}),  # Define layout for the map
         
-        html.Div([
-            html.H2("COVID Cases vs Mental Health"),  # Add heading for the time series
-            dcc.Graph(figure=fig2)  # Display the time series chart
-        ], style={'flex': '1', 'margin': '10px'})  # Define layout for the time series
-    ], style={'display': 'flex', 'justify-content': 'space-between'}),  # Set up a row with flexbox
+            html.Div([
+                html.H2("COVID Cases vs Mental Health"),  # Add heading for the time series
+                dcc.Graph(figure=fig2)  # Display the time series chart
+            ], style={'flex': '1', 'margin': '10px'})  # Define layout for the time series
+        ], style={'display': 'flex', 'justify-content': 'space-between'}),  # Set up a row with flexbox
 
-    # Bottom row: Bar charts
-    html.Div([
+        # Bottom row: Bar charts
         html.Div([
-            html.H2("Depressive Disorder Cases (2019-2021)"),  # Add heading for the bar chart
-            dcc.Graph(figure=fig3)  # Display the bar chart
-        ], style={'flex': '1', 'margin': '10px'}),  # Define layout for the bar chart
+            html.Div([
+                html.H2("Depressive Disorder Cases (2019-2021)"),  # Add heading for the bar chart
+                dcc.Graph(figure=fig3)  # Display the bar chart
+            ], style={'flex': '1', 'margin': '10px'}),  # Define layout for the bar chart
         
-        html.Div([
-            html.H2("COVID Distribution by Age"),  # Add heading for the age distribution
-            dcc.Graph(figure=fig4)  # Display the age distribution chart
-        ], style={'flex': '1', 'margin': '10px'})  # Define layout for the age distribution
-    ], style={'display': 'flex', 'justify-content': 'space-between'}),  # Set up another row with flexbox
-])
+            html.Div([
+                html.H2("COVID Distribution by Age"),  # Add heading for the age distribution
+                dcc.Graph(figure=fig4)  # Display the age distribution chart
+            ], style={'flex': '1', 'margin': '10px'})  # Define layout for the age distribution
+        ], style={'display': 'flex', 'justify-content': 'space-between'}),  # Set up another row with flexbox
+    ])
@@ -4,9 +4,7 @@ import pandas as pd  # For data manipulation
 import plotly.express as px  # For creating Plotly visualizations
 import plotly.graph_objects as go  # For creating advanced Plotly visualizations
 from plotly.subplots import make_subplots  # For creating subplots
-
-# Loading the dataset into a Pandas DataFrame
-df = pd.read_csv(r"medical.csv")
+from datasource import Query, get_data_source  # Shared CSV or database data source
 
 # Defining a pastel purple color palette for visualizations
 pastel_purple_palette = [
@@ -28,125 +26,145 @@ state_abbreviation_mapping = {
     'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT', 'Virginia': 'VA',
     'Washington': 'WA', 'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY'
 }
-df['StateAbbr'] = df['State'].map(state_abbreviation_mapping)
 
 # Mapping health bins for mental and physical health ratings
 def map_health_to_bins(value):
     return (value // 3) + 1  # Converts continuous days into grouped ratings
 
-df['MappedMentalHealth'] = df['MentalHealthDays'].apply(map_health_to_bins)  # Apply binning for mental health
-df['MappedPhysicalHealth'] = df['PhysicalHealthDays'].apply(map_health_to_bins)  # Apply binning for physical health
-df['Obese'] = df['BMI'] >= 30  # Define obesity based on BMI threshold (BMI >= 30)
-
-# Subplots: Obesity-related trends over time
-grouped_time = df.groupby('Year').agg({
-    'BMI': 'mean',  # Calculate average BMI
-    'MappedMentalHealth': 'mean',  # Calculate average mental health rating
-    'PhysicalActivities': lambda x: (x == 'Yes').mean() * 100,  # Calculate percentage of physically active individuals
-    'HadDiabetes': lambda x: (x == 'Yes').mean() * 100  # Calculate percentage of diabetics
-}).reset_index()
-
-fig1 = make_subplots(  # Create a 2x2 subplot layout
-    rows=2, cols=2,
-    subplot_titles=(
-        "Average BMI",
-        "Average Mental Health Rating",
-        "Percentage of Physically Active",
-        "Percentage of Diabetics"
+obese = ('BMI', '>=', 30)  # Define obesity based on BMI threshold (BMI >= 30)
+
+# Helper function to turn grouped row counts into a Series indexed by the grouping column
+def counts_by(grouped, column):
+    return grouped.groupby(column)['Count'].sum()
+
+# Building the page on demand; the data, figures and intermediates are released once it is returned
+def build_layout():
+    # Fetching the grouped aggregates behind every graph in one concurrent batch
+    data = get_data_source().aggregate_many({
+        'bmi_year': Query(by=['Year'], aggregates={'Count': ('count', None), 'BMI': ('mean', 'BMI')}),
+        'mental_year': Query(by=['Year', 'MentalHealthDays']),
+        'active_year': Query(by=['Year'], where=[('PhysicalActivities', '==', 'Yes')]),
+        'diabetes_year': Query(by=['Year'], where=[('HadDiabetes', '==', 'Yes')]),
+        'race': Query(by=['RaceEthnicityCategory']),
+        'obese_race': Query(by=['RaceEthnicityCategory'], where=[obese]),
+        'obese_sex': Query(by=['Sex'], where=[obese]),
+    })
+
+    # Subplots: Obesity-related trends over time
+    year_stats = data['bmi_year'].dropna(subset=['Year']).set_index('Year')
+    rows_per_year = year_stats['Count']  # Number of respondents per year
+    mental_year = data['mental_year'].dropna(subset=['MentalHealthDays'])
+    mapped_mental_total = (mental_year['MentalHealthDays'].apply(map_health_to_bins) * mental_year['Count']).groupby(mental_year['Year']).sum()
+    grouped_time = pd.DataFrame({
+        'BMI': year_stats['BMI'],  # Calculate average BMI
+        'MappedMentalHealth': (mapped_mental_total / counts_by(mental_year, 'Year')).reindex(rows_per_year.index),  # Calculate average mental health rating
+        'PhysicalActivities': counts_by(data['active_year'], 'Year').reindex(rows_per_year.index, fill_value=0) / rows_per_year * 100,  # Calculate percentage of physically active individuals
+        'HadDiabetes': counts_by(data['diabetes_year'], 'Year').reindex(rows_per_year.index, fill_value=0) / rows_per_year * 100  # Calculate percentage of diabetics
+    }).rename_axis('Year').reset_index()
+
+    fig1 = make_subplots(  # Create a 2x2 subplot layout
+        rows=2, cols=2,
+        subplot_titles=(
+            "Average BMI",
+            "Average Mental Health Rating",
+            "Percentage of Physically Active",
+            "Percentage of Diabetics"
+        )
     )
-)
-
-# Adding traces for each subplot
-fig1.add_trace(
-    go.Scatter(x=grouped_time['Year'], y=grouped_time['BMI'], mode='lines+markers', name='BMI', line=dict(color="#29259e")),
-    row=1, col=1
-)
-fig1.add_trace(
-    go.Scatter(x=grouped_time['Year'], y=grouped_time['MappedMentalHealth'], mode='lines+markers', name='Mental Health', line=dict(color='#8e259e')),
-    row=1, col=2
-)
-fig1.add_trace(
-    go.Scatter(x=grouped_time['Year'], y=grouped_time['PhysicalActivities'], mode='lines+markers', name='Physically Active', line=dict(color='#9e257e')),
-    row=2, col=1
-)
-fig1.add_trace(
-    go.Scatter(x=grouped_time['Year'], y=grouped_time['HadDiabetes'], mode='lines+markers', name='Diabetics', line=dict(color='#49259e')),
-    row=2, col=2
-)
-fig1.update_layout(title="Obesity-Related Trends Over Time", height=700, width=700)
-
-# Horizontal bar chart: Obesity percentage by race/ethnicity
-race_grouped = df.groupby('RaceEthnicityCategory').agg({
-    'Obese': lambda x: x.mean() * 100  # Calculate obesity percentage
-}).reset_index()
-
-fig2 = px.bar(
-    race_grouped,
-    x='Obese',
-    y='RaceEthnicityCategory',
-    orientation='h',  # Horizontal bar chart
-    title='Percentage of Obesity by Race/Ethnicity',
-    labels={'RaceEthnicityCategory': 'Race/Ethnicity', 'Obese': 'Percentage (%)'},
-    color='Obese',
-    color_continuous_scale=pastel_purple_palette
-)
-
-# Vertical bar chart: Percentage of obese individuals
-obesity_percentage = df['Obese'].mean() * 100  # Calculate overall obesity percentage
-obesity_data = pd.DataFrame({
-    'Category': ['Obese', 'Not Obese'],
-    'Percentage': [obesity_percentage, 100 - obesity_percentage]  # Calculate percentages for obese vs. not obese
-})
-fig3 = px.bar(
-    obesity_data,
-    x='Category',
-    y='Percentage',
-    title='Percentage of Obese Individuals',
-    labels={'Category': 'Category', 'Percentage': 'Percentage (%)'},
-    color='Category',
-    color_discrete_sequence=[pastel_purple_palette[1], pastel_purple_palette[6]]
-)
-
-# Donut chart: Gender distribution among obese individuals
-gender_distribution_obese = (
-    df[df['Obese']].groupby('Sex').size() / df[df['Obese']].shape[0] * 100  # Calculate gender distribution percentages
-)
-fig4 = go.Figure(data=[go.Pie(
-    labels=gender_distribution_obese.index,
-    values=gender_distribution_obese.values,
-    textinfo='label+percent',  # Display labels and percentages
-    hole=0.4,  # Create a donut chart
-    marker=dict(colors=[pastel_purple_palette[2], pastel_purple_palette[5]])  # Use palette colors
-)])
-fig4.update_layout(title='Gender Distribution Among Obese Individuals')
-
-# Dashboard 4 Layout
-layout = html.Div([
-    html.H1("Obesity and Health Dashboard", style={'textAlign': 'center'}),  # Add main heading
-
-    # Top row: Obesity trends and obesity by race/ethnicity
-    html.Div([
+
+    # Adding traces for each subplot
+    fig1.add_trace(
+        go.Scatter(x=grouped_time['Year'], y=grouped_time['BMI'], mode='lines+markers', name='BMI', line=dict(color="#29259e")),
+        row=1, col=1
+    )
+    fig1.add_trace(
+        go.Scatter(x=grouped_time['Year'], y=grouped_time['MappedMentalHealth'], mode='lines+markers', name='Mental Health', line=dict(color='#8e259e')),
+        row=1, col=2
+    )
+    fig1.add_trace(
+        go.Scatter(x=grouped_time['Year'], y=grouped_time['PhysicalActivities'], mode='lines+markers', name='Physically Active', line=dict(color='#9e257e')),
+        row=2, col=1
+    )
+    fig1.add_trace(
+        go.Scatter(x=grouped_time['Year'], y=grouped_time['HadDiabetes'], mode='lines+markers', name='Diabetics', line=dict(color='#49259e')),
+        row=2, col=2
+    )
+    fig1.update_layout(title="Obesity-Related Trends Over Time", height=700, width=700)
+
+    # Horizontal bar chart: Obesity percentage by race/ethnicity
+    rows_per_race = counts_by(data['race'].dropna(subset=['RaceEthnicityCategory']), 'RaceEthnicityCategory')  # Number of respondents per race/ethnicity
+    race_grouped = (
+        counts_by(data['obese_race'], 'RaceEthnicityCategory').reindex(rows_per_race.index, fill_value=0)
+        / rows_per_race * 100  # Calculate obesity percentage
+    ).rename('Obese').reset_index()
+
+    fig2 = px.bar(
+        race_grouped,
+        x='Obese',
+        y='RaceEthnicityCategory',
+        orientation='h',  # Horizontal bar chart
+        title='Percentage of Obesity by Race/Ethnicity',
+        labels={'RaceEthnicityCategory': 'Race/Ethnicity', 'Obese': 'Percentage (%)'},
+        color='Obese',
+        color_continuous_scale=pastel_purple_palette
+    )
+
+    # Vertical bar chart: Percentage of obese individuals
+    obesity_percentage = data['obese_race']['Count'].sum() / data['race']['Count'].sum() * 100  # Calculate overall obesity percentage
+    obesity_data = pd.DataFrame({
+        'Category': ['Obese', 'Not Obese'],
+        'Percentage': [obesity_percentage, 100 - obesity_percentage]  # Calculate percentages for obese vs. not obese
+    })
+    fig3 = px.bar(
+        obesity_data,
+        x='Category',
+        y='Percentage',
+        title='Percentage of Obese Individuals',
+        labels={'Category': 'Category', 'Percentage': 'Percentage (%)'},
+        color='Category',
+        color_discrete_sequence=[pastel_purple_palette[1], pastel_purple_palette[6]]
+    )
+
+    # Donut chart: Gender distribution among obese individuals
+    gender_distribution_obese = (
+        counts_by(data['obese_sex'], 'Sex') / data['obese_sex']['Count'].sum() * 100  # Calculate gender distribution percentages
+    )
+    fig4 = go.Figure(data=[go.Pie(
+        labels=gender_distribution_obese.index,
+        values=gender_distribution_obese.values,
+        textinfo='label+percent',  # Display labels and percentages
+        hole=0.4,  # Create a donut chart
+        marker=dict(colors=[pastel_purple_palette[2], pastel_purple_palette[5]])  # Use palette colors
+    )])
+    fig4.update_layout(title='Gender Distribution Among Obese Individuals')
+
+    # Dashboard 4 Layout
+    return html.Div([
+        html.H1("Obesity and Health Dashboard", style={'textAlign': 'center'}),  # Add main heading
+
+        # Top row: Obesity trends and obesity by race/ethnicity
         html.Div([
-            html.H2("Obesity-Related Trends Over Time"),  # Add heading for the trends plot
-            dcc.Graph(figure=fig1)  # Display the subplot figure
-        ], style={'flex': '1', 'margin': '10px'}),  # Define layout for the trends plot
+            html.Div([
+                html.H2("Obesity-Related Trends Over Time"),  # Add heading for the trends plot
+                dcc.Graph(figure=fig1)  # Display the subplot figure
+            ], style={'flex': '1', 'margin': '10px'}),  # Define layout for the trends plot
         
-        html.Div([
-            html.H2("Obesity by Race/Ethnicity"),  # Add heading for the bar chart
-            dcc.Graph(figure=fig2)  # Display the horizontal bar chart
-        ], style={'flex': '1', 'margin': '10px'})  # Define layout for the bar chart
-    ], style={'display': 'flex', 'justify-content': 'space-between'}),  # Set up a row with flexbox
+            html.Div([
+                html.H2("Obesity by Race/Ethnicity"),  # Add heading for the bar chart
+                dcc.Graph(figure=fig2)  # Display the horizontal bar chart
+            ], style={'flex': '1', 'margin': '10px'})  # Define layout for the bar chart
+        ], style={'display': 'flex', 'justify-content': 'space-between'}),  # Set up a row with flexbox
 
-    # Bottom row: Obesity percentage and gender distribution
-    html.Div([
+        # Bottom row: Obesity percentage and gender distribution
         html.Div([
-            html.H2("Percentage of Obese Individuals"),  # Add heading for the vertical bar chart
-            dcc.Graph(figure=fig3)  # Display the vertical bar chart
-        ], style={'flex': '1', 'margin': '10px'}),  # Define layout for the vertical bar chart
+            html.Div([
+                html.H2("Percentage of Obese Individuals"),  # Add heading for the vertical bar chart
+                dcc.Graph(figure=fig3)  # Display the vertical bar chart
+            ], style={'flex': '1', 'margin': '10px'}),  # Define layout for the vertical bar chart
         
-        html.Div([
-            html.H2("Gender Distribution Among Obese Individuals"),  # Add heading for the donut chart
-            dcc.Graph(figure=fig4)  # Display the donut chart
-        ], style={'flex': '1', 'margin': '10px'})  # Define layout for the donut chart
-    ], style={'display': 'flex', 'justify-content': 'space-between'}),  # Set up another row with flexbox
-])
+            html.Div([
+                html.H2("Gender Distribution Among Obese Individuals"),  # Add heading for the donut chart
+                dcc.Graph(figure=fig4)  # Display the donut chart
+            ], style={'flex': '1', 'margin': '10px'})  # Define layout for the donut chart
+        ], style={'display': 'flex', 'justify-content': 'space-between'}),  # Set up another row with flexbox
+    ])
@@ -0,0 +1,246 @@
+# Data-source adapters shared by the four dashboards.
+# Every dashboard asks for grouped aggregates (counts, sums, means) instead of
+# the raw survey rows, so a database-backed source can push the GROUP BY down
+# to the server and only fetch the (small) result rows.
+import os  # For reading the data-source configuration from the environment
+import operator  # For mapping filter operators onto pandas comparisons
+import threading  # For guarding the lazily-created shared source
+import time  # For the per-query deadline
+from collections import namedtuple  # For lightweight query descriptions
+from concurrent.futures import ThreadPoolExecutor  # For running queries concurrently
+from concurrent.futures import TimeoutError as FutureTimeoutError  # Raised when a query is too slow
+
+import pandas as pd  # For data manipulation
+
+# A grouped query: the columns to group by, the aggregates to compute and optional filters.
+#   aggregates: {output_name: (function, column)} with function one of 'count', 'sum', 'mean'
+#               ('count' counts rows, so its column may be None)
+#   where: list of (column, operator, value) with operator one of '==', '!=', '<', '<=', '>', '>=', 'in';
+#          as in SQL, rows whose column is missing never match a filter
+Query = namedtuple('Query', ['by', 'aggregates', 'where'])
+Query.__new__.__defaults__ = ({'Count': ('count', None)}, ())
+
+AGGREGATE_FUNCTIONS = ('count', 'sum', 'mean')
+
+COMPARISON_OPERATORS = {
+    '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le,
+    '>': operator.gt, '>=': operator.ge,
+}
+
+
+def _check_query(query):
+    # Reject unknown aggregate functions and operators before touching the data
+    for name, (function, column) in query.aggregates.items():
+        if function not in AGGREGATE_FUNCTIONS:
+            raise ValueError(f"Unknown aggregate function {function!r} for {name!r}")
+        if function != 'count' and column is None:
+            raise ValueError(f"Aggregate {name!r} needs a column")
+    for column, op, value in query.where:
+        if op != 'in' and op not in COMPARISON_OPERATORS:
+            raise ValueError(f"Unknown filter operator {op!r} on {column!r}")
+
+
+class DataSource:
+    # Base class: subclasses implement aggregate(); aggregate_many() runs a batch of queries
+
+    def aggregate(self, query):
+        raise NotImplementedError
+
+    def aggregate_many(self, queries):
+        # Run a {name: Query} mapping and return {name: DataFrame}
+        return {name: self.aggregate(query) for name, query in queries.items()}
+
+    def close(self):
+        pass
+
+
+class CsvDataSource(DataSource):
+    # Reads a local CSV once and answers every query in memory with pandas
+
+    def __init__(self, path):
+        self.path = path
+        self._df = None
+        self._lock = threading.Lock()
+
+    @property
+    def df(self):
+        # Load the file on first use only, even when several callbacks race for it
+        if self._df is None:
+            with self._lock:
+                if self._df is None:
+                    self._df = pd.read_csv(self.path)
+        return self._df
+
+    def aggregate(self, query):
+        _check_query(query)
+        df = self.df
+        mask = pd.Series(True, index=df.index)
+        for column, op, value in query.where:
+            mask &= df[column].notna()  # Missing values never match, like NULL in SQL
+            if op == 'in':
+                mask &= df[column].isin(list(value))
+            else:
+                mask &= COMPARISON_OPERATORS[op](df[column], value)
+        grouped = df[mask].groupby(list(query.by), dropna=False)  # Keep missing keys, like SQL GROUP BY
+        named = {}
+        for name, (function, column) in query.aggregates.items():
+            if function == 'count':
+                named[name] = (query.by[0], 'size')  # Row count, including rows with missing values
+            else:
+                named[name] = (column, function)
+        return grouped.agg(**named).reset_index()
+
+
+class SqlDataSource(DataSource):
+    # Pushes the grouped queries down to a SQL database (PostgreSQL, SQLite, ...)
+    # through a bounded connection pool.  Queries from concurrent callbacks share
+    # a per-worker executor, so at most max_concurrent_queries run at once and no
+    # request ever opens a connection of its own.  query_timeout limits how long a
+    # query may run once it has started; time spent queued behind other queries
+    # of the same worker is not counted.
+
+    def __init__(self, url, table='medical', pool_size=5, max_overflow=0,
+                 max_concurrent_queries=None, query_timeout=30.0):
+        import sqlalchemy as sa  # Optional dependency, only needed for database sources
+
+        self._sa = sa
+        self.table = table
+        self.query_timeout = query_timeout
+        self.max_concurrent_queries = max_concurrent_queries or pool_size
+
+        url = sa.engine.make_url(url)
+        self.backend = url.get_backend_name()
+        connect_args = {}
+        if self.backend == 'postgresql':
+            # Let the server cancel slow statements instead of leaving them running
+            connect_args['options'] = f"-c statement_timeout={int(query_timeout * 1000)}"
+        elif self.backend == 'sqlite':
+            connect_args['check_same_thread'] = False  # Pooled connections move between worker threads
+
+        self.engine = sa.create_engine(
+            url,
+            poolclass=sa.pool.QueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=query_timeout,  # Give up waiting for a free connection after the timeout
+            pool_pre_ping=True,  # Replace connections the server has dropped
+            connect_args=connect_args,
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent_queries,
+            thread_name_prefix='medical-sql',
+        )
+
+    def _build_statement(self, query):
+        sa = self._sa
+        names = list(query.by)
+        names += [column for _, column in query.aggregates.values() if column is not None]
+        names += [column for column, _, _ in query.where]
+        table = sa.table(self.table, *[sa.column(name) for name in dict.fromkeys(names)])
+        keys = [table.c[name] for name in query.by]
+        columns = list(keys)
+        for name, (function, column) in query.aggregates.items():
+            if function == 'count':
+                expression = sa.func.count()
+            elif function == 'sum':
+                expression = sa.func.sum(table.c[column])
+            else:
+                expression = sa.func.avg(table.c[column])
+            columns.append(expression.label(name))
+        statement = sa.select(*columns).select_from(table)
+        for column, op, value in query.where:
+            if op == 'in':
+                statement = statement.where(table.c[column].in_(list(value)))
+            else:
+                statement = statement.where(COMPARISON_OPERATORS[op](table.c[column], value))
+        # Sort the groups (missing keys last) so results match pandas' groupby order
+        return statement.group_by(*keys).order_by(*[key.asc().nulls_last() for key in keys])
+
+    def _fetch(self, connection, statement):
+        result = connection.execute(statement)
+        return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+    def _fetch_with_deadline(self, connection, statement, deadline):
+        if self.backend != 'sqlite':
+            return self._fetch(connection, statement)
+        # SQLite has no server-side timeout: interrupt the statement once the deadline passes
+        driver_connection = connection.connection.driver_connection
+        driver_connection.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
+        try:
+            return self._fetch(connection, statement)
+        finally:
+            driver_connection.set_progress_handler(None, 0)  # Pooled connections are reused
+
+    def _run(self, statement, aggregates, started):
+        started.set()
+        deadline = time.monotonic() + self.query_timeout
+        try:
+            with self.engine.connect() as connection:
+                df = self._fetch_with_deadline(connection, statement, deadline)
+        except self._sa.exc.OperationalError as error:
+            if time.monotonic() >= deadline:  # Cancelled by statement_timeout or the progress handler
+                raise TimeoutError(f"Query did not finish within {self.query_timeout} seconds") from error
+            raise
+        for name, (function, _) in aggregates.items():
+            if function == 'count':
+                df[name] = df[name].astype('int64')
+            elif df[name].dtype == object:
+                df[name] = df[name].astype(float)  # Some drivers return AVG/SUM as Decimal
+        return df
+
+    def _submit(self, query):
+        _check_query(query)
+        started = threading.Event()
+        future = self._executor.submit(self._run, self._build_statement(query), dict(query.aggregates), started)
+        return future, started
+
+    def _wait(self, submitted):
+        future, started = submitted
+        # The timeout starts once the query is running, not while it waits for a free worker
+        while not started.wait(0.05):
+            if future.done():
+                break
+        try:
+            # The extra second lets statement_timeout or the progress handler fire first
+            return future.result(timeout=self.query_timeout + 1)
+        except FutureTimeoutError:
+            # Backends without an enforced timeout: stop waiting, the worker finishes on its own
+            raise TimeoutError(f"Query did not finish within {self.query_timeout} seconds")
+
+    def aggregate(self, query):
+        return self._wait(self._submit(query))
+
+    def aggregate_many(self, queries):
+        # Submit the whole batch first so independent queries run concurrently
+        submitted = {name: self._submit(query) for name, query in queries.items()}
+        return {name: self._wait(pending) for name, pending in submitted.items()}
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.engine.dispose()
+
+
+# Shared source for all dashboards in this worker process
+_data_source = None
+_data_source_lock = threading.Lock()
+
+
+def get_data_source():
+    # MEDICAL_DATABASE_URL selects a database (e.g. postgresql://... or sqlite:///medical.db);
+    # without it the dashboards keep reading the local medical.csv file.
+    global _data_source
+    if _data_source is None:
+        with _data_source_lock:
+            if _data_source is None:
+                url = os.environ.get('MEDICAL_DATABASE_URL')
+                if url:
+                    _data_source = SqlDataSource(
+                        url,
+                        table=os.environ.get('MEDICAL_TABLE', 'medical'),
+                        pool_size=int(os.environ.get('MEDICAL_POOL_SIZE', 5)),
+                        query_timeout=float(os.environ.get('MEDICAL_QUERY_TIMEOUT', 30)),
+                    )
+                else:
+                    _data_source = CsvDataSource(os.environ.get('MEDICAL_CSV_PATH', 'medical.csv'))
+    return _data_source
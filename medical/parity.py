@@ -0,0 +1,81 @@
+# Parity check for the data sources: loads a CSV into a temporary SQLite database and
+# checks that CsvDataSource and SqlDataSource return the same rows, in the same order
+# and with the same column types, for every filter operator and aggregate function.
+# Usage: python parity.py [--csv medical.csv]   (without --csv a small built-in fixture is used)
+import argparse  # For reading the command-line options
+import os  # For building the temporary file paths
+import sys  # For reporting failures through the exit status
+import tempfile  # For the throw-away CSV and SQLite files
+
+import pandas as pd  # For data manipulation
+import sqlalchemy as sa  # For loading the CSV into SQLite
+from datasource import CsvDataSource, Query, SqlDataSource
+
+# Small survey-like fixture with missing values in keys, filter columns and aggregated columns
+fixture = pd.DataFrame({
+    'State': ['Texas', 'Ohio', 'Texas', None, 'Utah', 'Ohio', 'Texas', 'Utah', 'Ohio', None],
+    'Sex': ['Male', 'Female', 'Female', 'Male', None, 'Male', 'Female', 'Female', 'Male', 'Female'],
+    'CovidPos': ['Yes', 'No', 'Yes', 'Yes', None, 'No', 'Yes', 'No', None, 'Yes'],
+    'Year': [2019, 2020, 2020, 2021, 2019, 2020, 2021, 2021, 2019, 2020],
+    'MentalHealthDays': [0.0, 3.0, None, 30.0, 7.0, 3.0, 12.0, None, 0.0, 5.0],
+    'BMI': [22.5, 31.0, 28.4, None, 35.2, 30.0, 24.1, 29.9, None, 41.3],
+})
+
+queries = {
+    'count': Query(by=['State']),
+    'count by two keys': Query(by=['Year', 'Sex']),
+    'sum and mean': Query(by=['Sex'], aggregates={
+        'Count': ('count', None), 'Days': ('sum', 'MentalHealthDays'), 'BMI': ('mean', 'BMI'),
+    }),
+    '==': Query(by=['State'], where=[('CovidPos', '==', 'Yes')]),
+    '!=': Query(by=['State'], where=[('CovidPos', '!=', 'Yes')]),
+    '<': Query(by=['Sex'], where=[('BMI', '<', 30)]),
+    '<=': Query(by=['Sex'], where=[('BMI', '<=', 30)]),
+    '>': Query(by=['Sex'], where=[('MentalHealthDays', '>', 3)]),
+    '>=': Query(by=['Sex'], where=[('BMI', '>=', 30)]),
+    'in': Query(by=['Year'], where=[('State', 'in', ['Texas', 'Utah'])]),
+    'combined filters': Query(by=['Year', 'State'], where=[('CovidPos', '==', 'Yes'), ('Year', 'in', [2020, 2021])]),
+}
+
+
+def check_parity(csv_path, sqlite_path):
+    engine = sa.create_engine(f"sqlite:///{sqlite_path}")
+    pd.read_csv(csv_path).to_sql('medical', engine, index=False)
+    engine.dispose()
+
+    csv_source = CsvDataSource(csv_path)
+    sql_source = SqlDataSource(f"sqlite:///{sqlite_path}")
+    failures = 0
+    try:
+        for name, query in queries.items():
+            expected = csv_source.aggregate(query)
+            actual = sql_source.aggregate(query)
+            try:
+                # Group keys may come back as NaN from pandas and None from SQL, so only the aggregates' types are compared
+                pd.testing.assert_frame_equal(expected, actual, check_dtype=False)
+                for column in query.aggregates:
+                    assert expected[column].dtype == actual[column].dtype, (
+                        f"{column}: {expected[column].dtype} (CSV) != {actual[column].dtype} (SQL)")
+            except AssertionError as error:
+                failures += 1
+                print(f"FAIL {name}\n{error}\nCSV:\n{expected}\nSQL:\n{actual}")
+            else:
+                print(f"ok   {name}")
+    finally:
+        sql_source.close()
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare CsvDataSource and SqlDataSource results on the same data.")
+    parser.add_argument('--csv', help="survey CSV to compare on (default: a small built-in fixture)")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = args.csv
+        if csv_path is None:
+            csv_path = os.path.join(tmp, 'fixture.csv')
+            fixture.to_csv(csv_path, index=False)
+        failures = check_parity(csv_path, os.path.join(tmp, 'medical.db'))
+    if failures:
+        sys.exit(f"{failures} of {len(queries)} queries differ between the CSV and SQL sources")
+    print(f"All {len(queries)} queries match")
@@ -0,0 +1,38 @@
+# Rendering helpers shared by the matplotlib-based dashboards.
+# pyplot keeps every figure it creates alive until it is closed, and its state
+# (current figure, rcParams) is global, so each figure is drawn inside render_context()
+# and closed as soon as it has been encoded.
+import io  # For in-memory binary streams
+import base64  # For encoding images in base64 format
+import threading  # For serialising access to pyplot's global state
+from contextlib import contextmanager  # For building the rendering context
+
+import matplotlib
+matplotlib.use("Agg")  # Render off-screen; the app runs without a display
+import matplotlib.pyplot as plt  # For creating matplotlib visualizations
+
+_pyplot_lock = threading.RLock()
+
+
+@contextmanager
+def render_context():
+    # Wraps the drawing and encoding of matplotlib figures: one block runs at a time,
+    # style changes made inside are undone on exit and any figure still open
+    # (e.g. after an error) is closed.  Keep data fetching and plotly work outside it.
+    with _pyplot_lock, plt.rc_context():
+        open_before = set(plt.get_fignums())
+        try:
+            yield
+        finally:
+            for num in set(plt.get_fignums()) - open_before:
+                plt.close(num)
+
+
+# Helper function to convert a matplotlib figure into a base64-encoded image and release it
+def save_plot_to_base64(fig):
+    buf = io.BytesIO()  # Create an in-memory byte stream
+    try:
+        fig.savefig(buf, format="png")  # Save the figure as a PNG into the stream
+    finally:
+        plt.close(fig)  # Free the figure, its axes and artists
+    return base64.b64encode(buf.getvalue()).decode("utf-8")  # Encode as base64 and decode to string
@@ -0,0 +1,90 @@
+# Soak test for the dashboard pages: rebuilds every page thousands of times, the way
+# the app does on each visit, and fails if a page leaves matplotlib figures open or if
+# the resident memory of the process keeps growing.  With --threads > 1 each round
+# builds every page from several threads at once, like concurrent callbacks in a worker.
+# Usage: python soak.py [--iterations 2000] [--warmup 20] [--tolerance-mb 25] [--threads 1]
+import argparse  # For reading the command-line options
+import gc  # For collecting garbage before each memory reading
+import os  # For the system page size
+import sys  # For reporting failures through the exit status
+from concurrent.futures import ThreadPoolExecutor  # For building pages from several threads at once
+
+import dashboard1
+import dashboard2
+import dashboard3
+import dashboard4
+import matplotlib.pyplot as plt  # For checking that no figures are left open
+
+pages = {
+    'dashboard1': dashboard1.build_layout,
+    'dashboard2': dashboard2.build_layout,
+    'dashboard3': dashboard3.build_layout,
+    'dashboard4': dashboard4.build_layout,
+}
+
+
+# Resident set size of this process in MB, from /proc on Linux or psutil elsewhere
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        import psutil  # Optional dependency, only needed outside Linux
+        return psutil.Process().memory_info().rss / 2**20
+
+
+def build_all_pages(executor, threads):
+    if executor is None:
+        for name, build_layout in pages.items():
+            build_layout()
+            if plt.get_fignums():
+                sys.exit(f"{name} left {len(plt.get_fignums())} matplotlib figure(s) open")
+        return
+    # Every thread builds every page, in a different order, so the same pages overlap
+    names = list(pages)
+    futures = [
+        executor.submit(pages[name])
+        for offset in range(threads)
+        for name in names[offset % len(names):] + names[:offset % len(names)]
+    ]
+    for future in futures:
+        future.result()  # Re-raise any error from a page build
+    if plt.get_fignums():
+        sys.exit(f"concurrent page builds left {len(plt.get_fignums())} matplotlib figure(s) open")
+
+
+def soak(iterations, warmup, tolerance_mb, report_every, threads):
+    executor = ThreadPoolExecutor(max_workers=threads) if threads > 1 else None
+    try:
+        # Warm-up fills the one-off caches (data file, fonts, plotly templates) before the baseline is taken
+        for _ in range(warmup):
+            build_all_pages(executor, threads)
+        gc.collect()
+        baseline = current_rss_mb()
+        print(f"baseline RSS after {warmup} warm-up rounds: {baseline:.1f} MB")
+
+        for i in range(1, iterations + 1):
+            build_all_pages(executor, threads)
+            if i % report_every == 0 or i == iterations:
+                gc.collect()
+                rss = current_rss_mb()
+                print(f"round {i}/{iterations}: RSS {rss:.1f} MB ({rss - baseline:+.1f} MB)")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    growth = current_rss_mb() - baseline
+    if growth > tolerance_mb:
+        sys.exit(f"RSS grew by {growth:.1f} MB over {iterations} rounds (tolerance {tolerance_mb} MB)")
+    print(f"RSS stayed flat: {growth:+.1f} MB over {iterations} rounds")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rebuild every dashboard page repeatedly and check memory stays flat.")
+    parser.add_argument('--iterations', type=int, default=2000, help="rounds of rebuilding all four pages")
+    parser.add_argument('--warmup', type=int, default=20, help="rounds run before the baseline is taken")
+    parser.add_argument('--tolerance-mb', type=float, default=25.0, help="allowed RSS growth after warm-up")
+    parser.add_argument('--report-every', type=int, default=100, help="rounds between progress lines")
+    parser.add_argument('--threads', type=int, default=1, help="threads building the pages concurrently in each round")
+    args = parser.parse_args()
+    soak(args.iterations, args.warmup, args.tolerance_mb, args.report_every, args.threads)